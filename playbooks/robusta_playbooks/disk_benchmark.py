@@ -94,9 +94,7 @@ def disk_benchmark(event: ExecutionBaseEvent, action_params: DiskBenchmarkParams
             restartPolicy="Never",
         )
 
-        json_output = json.loads(
-            RobustaJob.run_simple_job_spec(spec, name, 120 + action_params.test_seconds).replace("'", '"')
-        )
+        json_output = json.loads(RobustaJob.run_simple_job_spec(spec, name, 120 + action_params.test_seconds))
         job = json_output["jobs"][0]
 
         benchmark_results = (
@@ -69,6 +69,13 @@ TRACE_INCOMING_REQUESTS = bool(os.environ.get("TRACE_INCOMING_REQUESTS", False))
 
 SERVICE_CACHE_TTL_SEC = int(os.environ.get("SERVICE_CACHE_TTL_SEC", 900))
 SERVICE_CACHE_MAX_SIZE = int(os.environ.get("SERVICE_CACHE_MAX_SIZE", 1000))
+POD_LIST_CACHE_TTL_SEC = float(os.environ.get("POD_LIST_CACHE_TTL_SEC", 2))
+POD_LIST_CACHE_MAX_SIZE = int(os.environ.get("POD_LIST_CACHE_MAX_SIZE", 100))
+# keep an in-memory copy of all pods, updated by a watch, and use it to look up pods
+ENABLE_POD_CACHE = os.environ.get("ENABLE_POD_CACHE", "false").lower() == "true"
+POD_CACHE_WATCH_TIMEOUT_SEC = int(os.environ.get("POD_CACHE_WATCH_TIMEOUT_SEC", 300))
+# reuse the pods of the debugger DaemonSet (deployed by the helm chart) instead of creating a debugger pod per command
+DEBUGGER_DAEMONSET_ENABLED = os.environ.get("DEBUGGER_DAEMONSET_ENABLED", "false").lower() == "true"
 
 PORT = int(os.environ.get("PORT", 5000))  # PORT
 
@@ -5,12 +5,14 @@ import os
 import re
 import tarfile
 import tempfile
+import threading
 import time
 import traceback
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from hikaru.model import Job
 from kubernetes import config
+from kubernetes.client import ApiClient
 from kubernetes.client.api import core_v1_api
 from kubernetes.client.rest import ApiException
 from kubernetes.stream import stream
@@ -27,6 +29,23 @@ except config.config_exception.ConfigException as e:
     logging.warning(f"Running without kube-config! e={e}")
 
 default_exec_command = ["/bin/sh", "-c"]
+kubernetes_name_illegal_chars = re.compile("[^0-9a-zA-Z\\-]+")
+
+_thread_local = threading.local()
+
+
+def get_api_client() -> ApiClient:
+    """
+    Returns an ApiClient for the current thread. Reusing it keeps the connection to the API server alive between calls
+    instead of building a new connection pool (and doing a new TLS handshake) for every request.
+    The python client can only decode json (not protobuf), so we ask the API server to gzip large responses instead
+    """
+    api_client = getattr(_thread_local, "api_client", None)
+    if api_client is None:
+        api_client = ApiClient()
+        api_client.set_default_header("Accept-Encoding", "gzip")
+        _thread_local.api_client = api_client
+    return api_client
 
 
 def wait_until(read_function, predicate_function, timeout_sec: float, backoff_wait_sec: float):
@@ -59,7 +78,7 @@ def wait_until_job_complete(job: Job, timeout):
         return j.status.completionTime is not None or j.status.failed is not None
 
     return wait_until(
-        lambda: Job.readNamespacedJob(job.metadata.name, job.metadata.namespace).obj,
+        lambda: Job.readNamespacedJob(job.metadata.name, job.metadata.namespace, client=get_api_client()).obj,
         is_job_complete,
         timeout,
         5,
@@ -74,7 +93,7 @@ def wait_for_pod_status(name, namespace, status: str, timeout_sec: float, backof
     start_time_sec = time.time()
     while start_time_sec + timeout_sec > time.time():
         try:
-            core_v1 = core_v1_api.CoreV1Api()
+            core_v1 = core_v1_api.CoreV1Api(get_api_client())
             resp = core_v1.read_namespaced_pod_status(name, namespace)
 
             if resp.status.phase == status:
@@ -97,6 +116,7 @@ def exec_shell_command(name, shell_command: str, namespace="default", container=
 
 
 def upload_file(name: str, destination: str, contents: bytes, namespace="default", container=None):
+    # stream() opens a websocket outside the client's connection pool, so reusing the thread's client gains nothing
     core_v1 = core_v1_api.CoreV1Api()
     resp = stream(
         core_v1.connect_get_namespaced_pod_exec,
@@ -141,7 +161,7 @@ def get_pod_logs(
 ):
     resp = None
     try:
-        core_v1 = core_v1_api.CoreV1Api()
+        core_v1 = core_v1_api.CoreV1Api(get_api_client())
         resp = core_v1.read_namespaced_pod_log(
             name,
             namespace,
@@ -163,12 +183,67 @@ def get_pod_logs(
     return resp
 
 
+def iter_pod_logs(
+    name,
+    namespace="default",
+    container="",
+    previous=None,
+    tail_lines=None,
+    since_seconds=None,
+    chunk_size=64 * 1024,
+) -> Iterator[str]:
+    """
+    Like get_pod_logs() but yields the logs line by line as they are read, instead of loading them all into memory
+    """
+    try:
+        core_v1 = core_v1_api.CoreV1Api(get_api_client())
+        resp = core_v1.read_namespaced_pod_log(
+            name,
+            namespace,
+            container=container,
+            previous=previous,
+            tail_lines=tail_lines,
+            since_seconds=since_seconds,
+            _preload_content=False,  # return the raw response so we can read it incrementally
+        )
+    except ApiException as e:
+        if e.status != 404:
+            logging.exception(f"failed to get pod logs {name} {namespace} {container}")
+        return
+
+    try:
+        yield from iter_lines(resp.stream(chunk_size))
+    finally:
+        resp.release_conn()
+
+
+def iter_lines(chunks: Iterator[bytes]) -> Iterator[str]:
+    """
+    Splits a stream of raw chunks into lines, each ending with a newline except maybe the last one.
+    Lines are decoded only when complete, so multi-byte characters split between chunks are decoded correctly
+    """
+    # parts of the current line, joined only once the line ends, so long lines aren't copied for every chunk
+    pending: List[bytes] = []
+    for chunk in chunks:
+        lines = chunk.split(b"\n")
+        if len(lines) > 1:
+            pending.append(lines[0])
+            yield b"".join(pending).decode("utf-8") + "\n"
+            for line in lines[1:-1]:
+                yield line.decode("utf-8") + "\n"
+            pending = []
+        pending.append(lines[-1])
+    last_line = b"".join(pending)
+    if last_line:
+        yield last_line.decode("utf-8")
+
+
 def list_available_services(
     namespace="default",
 ):
     resp = None
     try:
-        core_v1 = core_v1_api.CoreV1Api()
+        core_v1 = core_v1_api.CoreV1Api(get_api_client())
         resp = core_v1.list_namespaced_service(
             namespace,
             _preload_content=False  # If this flag is not used, double quotes in json objects in stdout are converted
@@ -211,6 +286,7 @@ def exec_commands(name, exec_command, namespace="default", container=None):
 
     wsclient = None
     try:
+        # stream() opens a websocket outside the client's connection pool, so reusing the thread's client gains nothing
         core_v1 = core_v1_api.CoreV1Api()
         wsclient = stream(
             core_v1.connect_get_namespaced_pod_exec,
@@ -240,7 +316,7 @@ def to_kubernetes_name(name, prefix=""):
     see https://kubernetes.io/docs/concepts/overview/working-with-objects/names/
     """
     unique_id = str(time.time()).replace(".", "-")
-    safe_name = re.sub("[^0-9a-zA-Z\\-]+", "-", name)
+    safe_name = kubernetes_name_illegal_chars.sub("-", name)
     return f"{prefix}{safe_name}-{unique_id}"[:63]
 
 
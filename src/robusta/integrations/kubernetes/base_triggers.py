@@ -67,8 +67,7 @@ class K8sBaseTrigger(BaseTrigger):
         if not isinstance(event, K8sTriggerEvent):
             return False
 
-        k8s_trigger_event = K8sTriggerEvent(**event.dict())
-        k8s_payload = k8s_trigger_event.k8s_payload
+        k8s_payload = event.k8s_payload
         if self.kind != "Any" and self.kind != k8s_payload.kind:
             return False
 
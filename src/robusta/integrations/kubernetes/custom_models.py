@@ -1,26 +1,39 @@
+import bisect
+import copy
 import json
 import logging
 import re
+import threading
 from enum import Enum, auto
-from typing import Dict, List, Optional, Tuple, Type, TypeVar
+from typing import Dict, Iterator, List, Optional, Tuple, Type, TypeVar
 
 import hikaru
-import yaml
+from cachetools import TTLCache
 from hikaru.model import *  # * import is necessary for hikaru subclasses to work
 from pydantic import BaseModel
 
-from robusta.core.model.env_vars import INSTALLATION_NAMESPACE, RELEASE_NAME
+from robusta.core.model.env_vars import (
+    DEBUGGER_DAEMONSET_ENABLED,
+    ENABLE_POD_CACHE,
+    INSTALLATION_NAMESPACE,
+    POD_LIST_CACHE_MAX_SIZE,
+    POD_LIST_CACHE_TTL_SEC,
+    RELEASE_NAME,
+)
 from robusta.integrations.kubernetes.api_client_utils import (
     SUCCEEDED_STATE,
     exec_shell_command,
+    get_api_client,
     get_pod_logs,
+    iter_pod_logs,
     prepare_pod_command,
     to_kubernetes_name,
     upload_file,
     wait_for_pod_status,
     wait_until_job_complete,
 )
-from robusta.integrations.kubernetes.templates import get_deployment_yaml
+from robusta.integrations.kubernetes.pod_cache import pod_cache
+from robusta.integrations.kubernetes.templates import get_deployment_dict
 from robusta.utils.parsing import load_json
 
 S = TypeVar("S")
@@ -30,6 +43,8 @@ T = TypeVar("T")
 # TODO: import these from the python-tools project
 PYTHON_DEBUGGER_IMAGE = "us-central1-docker.pkg.dev/genuine-flight-317411/devel/debug-toolkit:v5.0"
 JAVA_DEBUGGER_IMAGE = "us-central1-docker.pkg.dev/genuine-flight-317411/devel/java-toolkit-11:jattach"
+# must match the labels of the debugger DaemonSet in the helm chart
+DEBUGGER_DAEMONSET_LABEL_SELECTOR = "robustaComponent=debugger"
 
 
 class Process(BaseModel):
@@ -42,6 +57,32 @@ class ProcessList(BaseModel):
     processes: List[Process]
 
 
+# recent pod lists by namespace, so that a burst of find_pod() calls doesn't list the same namespace again and again
+# each entry holds the pod names and the pods, both sorted by name
+_pod_list_cache: TTLCache = TTLCache(maxsize=POD_LIST_CACHE_MAX_SIZE, ttl=POD_LIST_CACHE_TTL_SEC)
+_pod_list_cache_lock = threading.Lock()
+
+
+def _cast_hikaru(obj: HikaruBase, cls: Type[S]) -> S:
+    """
+    Returns a shallow copy of a hikaru object as one of our subclasses, which add methods but no fields.
+    This works around https://github.com/haxsaw/hikaru/issues/15 without serializing and deserializing the object.
+    Nested objects are shared with the original, which is left unchanged
+    """
+    new_obj = copy.copy(obj)
+    new_obj.__class__ = cls
+    return new_obj
+
+
+def _use_pod_cache() -> bool:
+    return ENABLE_POD_CACHE and pod_cache.is_synced()
+
+
+def _pod_from_cache(pod: dict) -> "RobustaPod":
+    # pods in lists (unlike pods in watch events) don't have apiVersion and kind
+    return hikaru.from_dict({**pod, "apiVersion": "v1", "kind": "Pod"}, cls=RobustaPod)
+
+
 def _get_match_expression_filter(expression: LabelSelectorRequirement) -> str:
     if expression.operator.lower() == "exists":
         return expression.key
@@ -64,15 +105,13 @@ def list_pods_using_selector(namespace: str, selector: LabelSelector, field_sele
         namespace=namespace,
         label_selector=labels_selector,
         field_selector=field_selector,
+        client=get_api_client(),
     ).obj.items
 
 
 def _get_image_name_and_tag(image: str) -> Tuple[str, str]:
-    if ":" in image:
-        image_name, image_tag = image.split(":", maxsplit=1)
-        return image_name, image_tag
-    else:
-        return image, "<NONE>"
+    image_name, sep, image_tag = image.partition(":")
+    return image_name, image_tag if sep else "<NONE>"
 
 
 def get_images(containers: List[Container]) -> Dict[str, str]:
@@ -135,7 +174,7 @@ class RobustaEvent:
         if namespace:
             field_selector += f",involvedObject.namespace={namespace}"
 
-        return Event.listEventForAllNamespaces(field_selector=field_selector).obj
+        return Event.listEventForAllNamespaces(field_selector=field_selector, client=get_api_client()).obj
 
 
 class RegexReplacementStyle(Enum):
@@ -200,6 +239,20 @@ class RobustaPod(Pod):
 
         return pods_logs
 
+    def iter_logs(self, container=None, previous=None, tail_lines=None) -> Iterator[str]:
+        """
+        Fetch pod logs line by line, without loading all of them into memory at once
+        """
+        if container is None:
+            container = self.spec.containers[0].name
+        return iter_pod_logs(
+            self.metadata.name,
+            self.metadata.namespace,
+            container,
+            previous,
+            tail_lines,
+        )
+
     @staticmethod
     def exec_in_java_pod(
         pod_name: str, node_name: str, debug_cmd=None, override_jtk_image: str = JAVA_DEBUGGER_IMAGE
@@ -254,7 +307,7 @@ class RobustaPod(Pod):
             ),
         )
         # TODO: check the result code
-        debugger = debugger.createNamespacedPod(debugger.metadata.namespace).obj
+        debugger = debugger.createNamespacedPod(debugger.metadata.namespace, client=get_api_client()).obj
         return debugger
 
     @staticmethod
@@ -263,7 +316,7 @@ class RobustaPod(Pod):
         try:
             node_runner.exec(f"nsenter -t 1 -a {cmd}")
         finally:
-            node_runner.delete()
+            node_runner.delete(client=get_api_client())
 
     @staticmethod
     def run_debugger_pod(
@@ -281,15 +334,45 @@ class RobustaPod(Pod):
 
             return debugger.get_logs()
         finally:
-            RobustaPod.deleteNamespacedPod(debugger.metadata.name, debugger.metadata.namespace)
+            RobustaPod.deleteNamespacedPod(debugger.metadata.name, debugger.metadata.namespace, client=get_api_client())
+
+    @staticmethod
+    def find_node_debugger_pod(node_name: str, debug_image: str) -> Optional["RobustaPod"]:
+        """
+        Returns the running debugger DaemonSet pod on the node, if there is one and it uses debug_image
+        """
+        pods: PodList = PodList.listNamespacedPod(
+            INSTALLATION_NAMESPACE,
+            label_selector=DEBUGGER_DAEMONSET_LABEL_SELECTOR,
+            field_selector=f"spec.nodeName={node_name},status.phase=Running",
+            client=get_api_client(),
+        ).obj
+        for pod in pods.items:
+            if pod.spec.containers[0].image == debug_image:
+                return _cast_hikaru(pod, RobustaPod)
+        return None
 
     @staticmethod
     def exec_in_debugger_pod(pod_name: str, node_name: str, cmd, debug_image=PYTHON_DEBUGGER_IMAGE) -> str:
+        if DEBUGGER_DAEMONSET_ENABLED:
+            node_debugger = RobustaPod.find_node_debugger_pod(node_name, debug_image)
+            if node_debugger is not None:
+                try:
+                    return node_debugger.exec(cmd)
+                except Exception:
+                    logging.exception(
+                        f"exec in debugger DaemonSet pod {node_debugger.metadata.name} failed, creating a debugger pod"
+                    )
+            else:
+                logging.info(
+                    f"no debugger DaemonSet pod with image {debug_image} on {node_name}, creating a debugger pod"
+                )
+
         debugger = RobustaPod.create_debugger_pod(pod_name, node_name, debug_image)
         try:
             return debugger.exec(cmd)
         finally:
-            RobustaPod.deleteNamespacedPod(debugger.metadata.name, debugger.metadata.namespace)
+            RobustaPod.deleteNamespacedPod(debugger.metadata.name, debugger.metadata.namespace, client=get_api_client())
 
     @staticmethod
     def extract_container_id(status: ContainerStatus) -> str:
@@ -303,8 +386,8 @@ class RobustaPod(Pod):
             self.spec.nodeName,
             f"debug-toolkit pod-ps {self.metadata.uid} {container_ids}",
         )
-        processes = ProcessList(**load_json(output))
-        return processes.processes
+        # the output is produced by our own debug-toolkit, so we skip pydantic validation and build the models directly
+        return [Process.construct(**process) for process in load_json(output)["processes"]]
 
     def get_images(self) -> Dict[str, str]:
         return get_images(self.spec.containers)
@@ -338,29 +421,69 @@ class RobustaPod(Pod):
 
     @staticmethod
     def find_pods_with_direct_owner(namespace: str, owner_uid: str) -> List["RobustaPod"]:
-        all_pods: List["RobustaPod"] = PodList.listNamespacedPod(namespace).obj.items
+        all_pods: List["RobustaPod"] = PodList.listNamespacedPod(namespace, client=get_api_client()).obj.items
         return list(filter(lambda p: p.has_direct_owner(owner_uid), all_pods))
 
     @staticmethod
-    def find_pod(name_prefix, namespace) -> "RobustaPod":
-        pods: PodList = PodList.listNamespacedPod(namespace).obj
-        for pod in pods.items:
-            if pod.metadata.name.startswith(name_prefix):
-                # we serialize and then deserialize to work around https://github.com/haxsaw/hikaru/issues/15
-                return hikaru.from_dict(pod.to_dict(), cls=RobustaPod)
+    def __find_by_name_prefix(names: List[str], pods: List[Pod], name_prefix: str) -> Optional["RobustaPod"]:
+        # names are sorted, so if any name starts with the prefix, the first one is where the prefix would be inserted
+        i = bisect.bisect_left(names, name_prefix)
+        if i < len(names) and names[i].startswith(name_prefix):
+            # the pods are shared through _pod_list_cache, so callers get their own copy of the matched pod
+            return _cast_hikaru(copy.deepcopy(pods[i]), RobustaPod)
+        return None
+
+    @staticmethod
+    def find_pod(name_prefix, namespace, exact_name: bool = False) -> "RobustaPod":
+        """
+        Find a pod by name prefix, or by its full name if exact_name is set.
+        Exact names are filtered by the API server. Prefix lookups may use a pod list that is a few seconds old
+        """
+        if exact_name:
+            pods: PodList = PodList.listNamespacedPod(
+                namespace, field_selector=f"metadata.name={name_prefix}", client=get_api_client()
+            ).obj
+            if pods.items:
+                return _cast_hikaru(pods.items[0], RobustaPod)
+            raise Exception(f"No pod exists in namespace '{namespace}' with name '{name_prefix}'")
+
+        if _use_pod_cache():
+            cached_pod = pod_cache.find_pod(namespace, name_prefix)
+            if cached_pod is not None:
+                return _pod_from_cache(cached_pod)
+
+        # the API server can't filter by prefix, so we have to list the whole namespace
+        with _pod_list_cache_lock:
+            cached = _pod_list_cache.get(namespace)
+        if cached is not None:
+            pod = RobustaPod.__find_by_name_prefix(*cached, name_prefix)
+            if pod is not None:
+                return pod
+
+        # not found in the cache, but it might be a new pod. list the namespace again
+        # the API server usually returns pods sorted by name already, so sorting is cheap
+        pods = sorted(
+            PodList.listNamespacedPod(namespace, client=get_api_client()).obj.items, key=lambda p: p.metadata.name
+        )
+        names = [pod.metadata.name for pod in pods]
+        with _pod_list_cache_lock:
+            _pod_list_cache[namespace] = (names, pods)
+        pod = RobustaPod.__find_by_name_prefix(names, pods, name_prefix)
+        if pod is not None:
+            return pod
         raise Exception(f"No pod exists in namespace '{namespace}' with name prefix '{name_prefix}'")
 
     # TODO: replace with Hikaru Pod().read() but note that usage is slightly different as this is a staticmethod
     @staticmethod
     def read(name: str, namespace: str) -> "RobustaPod":
         """Read pod definition from the API server"""
-        return Pod.readNamespacedPod(name, namespace).obj
+        return Pod.readNamespacedPod(name, namespace, client=get_api_client()).obj
 
 
 class RobustaDeployment(Deployment):
     @classmethod
     def from_image(cls: Type[T], name, image="busybox", cmd=None) -> T:
-        obj: RobustaDeployment = hikaru.from_dict(yaml.safe_load(get_deployment_yaml(name, image)), RobustaDeployment)
+        obj: RobustaDeployment = hikaru.from_dict(get_deployment_dict(name, image), RobustaDeployment)
         obj.spec.template.spec.containers[0].command = prepare_pod_command(cmd)
         return obj
 
@@ -373,11 +496,15 @@ class RobustaJob(Job):
         """
         gets the pods associated with a job
         """
+        if _use_pod_cache():
+            cached_pods = pod_cache.find_pods_by_label(self.metadata.namespace, "job-name", self.metadata.name)
+            if cached_pods:
+                return [_pod_from_cache(pod) for pod in cached_pods]
+
         pods: PodList = PodList.listNamespacedPod(
-            self.metadata.namespace, label_selector=f"job-name = {self.metadata.name}"
+            self.metadata.namespace, label_selector=f"job-name = {self.metadata.name}", client=get_api_client()
         ).obj
-        # we serialize and then deserialize to work around https://github.com/haxsaw/hikaru/issues/15
-        return [hikaru.from_dict(pod.to_dict(), cls=RobustaPod) for pod in pods.items]
+        return [_cast_hikaru(pod, RobustaPod) for pod in pods.items]
 
     def get_single_pod(self) -> RobustaPod:
         """
@@ -400,10 +527,9 @@ class RobustaJob(Job):
             ),
         )
         try:
-            job = job.createNamespacedJob(job.metadata.namespace).obj
-            job = hikaru.from_dict(job.to_dict(), cls=RobustaJob)  # temporary workaround for hikaru bug #15
-            job: RobustaJob = wait_until_job_complete(job, timeout)
-            job = hikaru.from_dict(job.to_dict(), cls=RobustaJob)  # temporary workaround for hikaru bug #15
+            job = job.createNamespacedJob(job.metadata.namespace, client=get_api_client()).obj
+            job = _cast_hikaru(job, RobustaJob)
+            job = _cast_hikaru(wait_until_job_complete(job, timeout), RobustaJob)
             pod = job.get_single_pod()
             return pod.get_logs()
         finally:
@@ -411,6 +537,7 @@ class RobustaJob(Job):
                 job.metadata.name,
                 job.metadata.namespace,
                 propagation_policy="Foreground",
+                client=get_api_client(),
             )
 
     @classmethod
@@ -0,0 +1,126 @@
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from kubernetes.client.api import core_v1_api
+
+from robusta.core.model.env_vars import POD_CACHE_WATCH_TIMEOUT_SEC
+from robusta.integrations.kubernetes.api_client_utils import iter_lines
+
+# client side timeouts, so a connection that was dropped silently fails instead of blocking the cache forever
+CONNECT_TIMEOUT_SEC = 10
+LIST_READ_TIMEOUT_SEC = 60
+# the API server ends the watch after POD_CACHE_WATCH_TIMEOUT_SEC, even when there were no events to send
+WATCH_READ_TIMEOUT_SEC = POD_CACHE_WATCH_TIMEOUT_SEC + 30
+
+
+class PodCache:
+    """
+    An in-memory copy of all the pods in the cluster, kept up to date by watching the API server.
+    Pods are stored as the raw dicts returned by the API server, by namespace and name.
+    """
+
+    def __init__(self):
+        self.__pods: Dict[str, Dict[str, dict]] = {}
+        self.__lock = threading.Lock()
+        self.__synced = False
+        self.__thread: Optional[threading.Thread] = None
+
+    def start(self):
+        with self.__lock:
+            if self.__thread is not None:
+                return
+            self.__thread = threading.Thread(target=self.__run, name="pod-cache", daemon=True)
+        self.__thread.start()
+
+    def is_synced(self) -> bool:
+        return self.__synced
+
+    def find_pod(self, namespace: str, name_prefix: str) -> Optional[dict]:
+        """
+        Returns the pod with the lowest name that starts with name_prefix, like a prefix search over a pod list
+        """
+        with self.__lock:
+            namespace_pods = self.__pods.get(namespace, {})
+            pod = namespace_pods.get(name_prefix)
+            if pod is not None:
+                return pod
+            name = min((name for name in namespace_pods if name.startswith(name_prefix)), default=None)
+            return namespace_pods[name] if name is not None else None
+
+    def find_pods_by_label(self, namespace: str, label: str, value: str) -> List[dict]:
+        with self.__lock:
+            return [
+                pod
+                for pod in self.__pods.get(namespace, {}).values()
+                if (pod["metadata"].get("labels") or {}).get(label) == value
+            ]
+
+    def __run(self):
+        # a plain client, without get_api_client()'s gzip header, because we read the watch response without
+        # decoding it
+        core_v1 = core_v1_api.CoreV1Api()
+        while True:
+            try:
+                resource_version = self.__list(core_v1)
+                while resource_version:
+                    resource_version = self.__watch(core_v1, resource_version)
+                logging.info("pod cache resource version expired, listing pods again")
+            except Exception:
+                logging.exception("pod cache failed to sync, listing pods again")
+                self.__synced = False
+                time.sleep(5)
+
+    def __list(self, core_v1: core_v1_api.CoreV1Api) -> str:
+        resp = core_v1.list_pod_for_all_namespaces(
+            _preload_content=False, _request_timeout=(CONNECT_TIMEOUT_SEC, LIST_READ_TIMEOUT_SEC)
+        )
+        pod_list = json.loads(resp.data)
+        pods: Dict[str, Dict[str, dict]] = {}
+        for pod in pod_list["items"]:
+            pods.setdefault(pod["metadata"]["namespace"], {})[pod["metadata"]["name"]] = pod
+
+        with self.__lock:
+            self.__pods = pods
+        self.__synced = True
+        return pod_list["metadata"]["resourceVersion"]
+
+    def __watch(self, core_v1: core_v1_api.CoreV1Api, resource_version: str) -> Optional[str]:
+        """
+        Applies watch events to the cache until the API server ends the watch.
+        Returns the resource version to continue watching from, or None if we need to list the pods again
+        """
+        resp = core_v1.list_pod_for_all_namespaces(
+            watch=True,
+            resource_version=resource_version,
+            timeout_seconds=POD_CACHE_WATCH_TIMEOUT_SEC,
+            _preload_content=False,
+            _request_timeout=(CONNECT_TIMEOUT_SEC, WATCH_READ_TIMEOUT_SEC),
+        )
+        try:
+            for line in iter_lines(resp.read_chunked(decode_content=False)):
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if event["type"] == "ERROR":  # usually 410 Gone, because our resource version is too old
+                    logging.info(f"pod cache watch error {event['object']}")
+                    return None
+
+                pod = event["object"]
+                namespace = pod["metadata"]["namespace"]
+                name = pod["metadata"]["name"]
+                with self.__lock:
+                    if event["type"] == "DELETED":
+                        self.__pods.get(namespace, {}).pop(name, None)
+                    else:
+                        self.__pods.setdefault(namespace, {})[name] = pod
+                resource_version = pod["metadata"]["resourceVersion"]
+        finally:
+            resp.release_conn()
+
+        return resource_version
+
+
+pod_cache = PodCache()
@@ -1,5 +1,8 @@
+import copy
 import textwrap
 
+import yaml
+
 from robusta.core.model.env_vars import INSTALLATION_NAMESPACE
 
 
@@ -29,3 +32,20 @@ def get_deployment_yaml(name, image="busybox"):
           imagePullPolicy: Always
   """
     )
+
+
+# parsed once, so that get_deployment_dict() doesn't need to parse yaml on every call
+_DEPLOYMENT_TEMPLATE = yaml.safe_load(get_deployment_yaml("__NAME__", "__IMAGE__"))
+
+
+def get_deployment_dict(name, image="busybox") -> dict:
+    """
+    Like get_deployment_yaml() but returns the deployment as a dict, copied from a pre-parsed template
+    """
+    deployment = copy.deepcopy(_DEPLOYMENT_TEMPLATE)
+    deployment["metadata"]["name"] = name
+    deployment["metadata"]["labels"]["app"] = name
+    deployment["spec"]["selector"]["matchLabels"]["app"] = name
+    deployment["spec"]["template"]["metadata"]["labels"]["app"] = name
+    deployment["spec"]["template"]["spec"]["containers"][0]["image"] = image
+    return deployment
@@ -1,11 +1,13 @@
 from robusta.core.model.env_vars import (
     ADDITIONAL_CERTIFICATE,
+    ENABLE_POD_CACHE,
     ENABLE_TELEMETRY,
     ROBUSTA_TELEMETRY_ENDPOINT,
     SEND_ADDITIONAL_TELEMETRY,
     TELEMETRY_PERIODIC_SEC,
 )
 from robusta.core.playbooks.playbooks_event_handler_impl import PlaybooksEventHandlerImpl
+from robusta.integrations.kubernetes.pod_cache import pod_cache
 from robusta.model.config import Registry
 from robusta.patch.patch import create_monkey_patches
 from robusta.runner.config_loader import ConfigLoader
@@ -35,6 +37,9 @@ def main():
     else:
         logging.info("Telemetry is disabled.")
 
+    if ENABLE_POD_CACHE:
+        pod_cache.start()
+
     Web.init(event_handler, loader)
     Web.run()  # blocking
     loader.close()
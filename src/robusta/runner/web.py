@@ -42,8 +42,9 @@ class Web:
         req_json = request.get_json()
         Web._trace_incoming("alerts", req_json)
         alert_manager_event = AlertManagerEvent(**req_json)
+        # the alerts were already validated as part of AlertManagerEvent, so there's no need to validate them again
         for alert in alert_manager_event.alerts:
-            Web.alerts_queue.add_task(Web.event_handler.handle_trigger, PrometheusTriggerEvent(alert=alert))
+            Web.alerts_queue.add_task(Web.event_handler.handle_trigger, PrometheusTriggerEvent.construct(alert=alert))
 
         Web.event_handler.get_telemetry().last_alert_at = str(datetime.now())
         return jsonify(success=True)
@@ -54,7 +55,9 @@ class Web:
         data = request.get_json()["data"]
         Web._trace_incoming("api server", data)
         k8s_payload = IncomingK8sEventPayload(**data)
-        Web.api_server_queue.add_task(Web.event_handler.handle_trigger, K8sTriggerEvent(k8s_payload=k8s_payload))
+        # k8s_payload is already validated, so there's no need to validate (and copy) it again
+        trigger_event = K8sTriggerEvent.construct(k8s_payload=k8s_payload)
+        Web.api_server_queue.add_task(Web.event_handler.handle_trigger, trigger_event)
         return jsonify(success=True)
 
     @staticmethod
@@ -1,29 +1,38 @@
 import logging
 import threading
-from collections import defaultdict
-from datetime import datetime
+import time
+from collections import OrderedDict
+from typing import Tuple
 
 
 class RateLimiter:
 
+    # the least recently run operations are dropped once we track more than this many
+    MAX_ENTRIES = 10000
     limiter_lock = threading.Lock()
-    limiter_map = defaultdict(None)
+    limiter_map: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
 
     @staticmethod
     def mark_and_test(operation: str, id: str, period_seconds: int) -> bool:
+        limiter_key = (operation, id)
+        limiter_map = RateLimiter.limiter_map
+        curr_seconds = time.monotonic()
+        # most calls are rate limited, so check without taking the lock first
+        last_run = limiter_map.get(limiter_key)
+        if last_run is not None and curr_seconds - last_run <= period_seconds:
+            logging.debug(f"rate limited operation is NOT allowed: {limiter_key}")
+            return False
+
         with RateLimiter.limiter_lock:
-            limiter_key = operation + id
-            last_run = RateLimiter.limiter_map.get(limiter_key)
-            curr_seconds = datetime.utcnow().timestamp()
-            if last_run:
-                if curr_seconds - last_run > period_seconds:
-                    RateLimiter.limiter_map[limiter_key] = curr_seconds
-                    logging.debug(f"rate limited operation is allowed because enough time has passed: {limiter_key}")
-                    return True
-                else:
-                    logging.debug(f"rate limited operation is NOT allowed: {limiter_key}")
-                    return False
-            else:
-                logging.debug(f"rate limited operation is allowed because it is the first time: {limiter_key}")
-                RateLimiter.limiter_map[limiter_key] = curr_seconds
-                return True
+            # check again, another thread might have run the operation since we checked
+            last_run = limiter_map.get(limiter_key)
+            if last_run is not None and curr_seconds - last_run <= period_seconds:
+                logging.debug(f"rate limited operation is NOT allowed: {limiter_key}")
+                return False
+
+            logging.debug(f"rate limited operation is allowed: {limiter_key} last run: {last_run}")
+            limiter_map[limiter_key] = curr_seconds
+            limiter_map.move_to_end(limiter_key)
+            if len(limiter_map) > RateLimiter.MAX_ENTRIES:
+                limiter_map.popitem(last=False)
+            return True
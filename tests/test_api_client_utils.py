@@ -0,0 +1,44 @@
+from typing import List
+
+from kubernetes.client.api import core_v1_api
+
+from robusta.integrations.kubernetes.api_client_utils import iter_pod_logs
+
+
+class FakeLogResponse:
+    def __init__(self, chunks: List[bytes]):
+        self.chunks = chunks
+        self.released = False
+
+    def stream(self, chunk_size):
+        yield from self.chunks
+
+    def release_conn(self):
+        self.released = True
+
+
+def fake_pod_logs(monkeypatch, chunks: List[bytes]) -> FakeLogResponse:
+    resp = FakeLogResponse(chunks)
+    monkeypatch.setattr(core_v1_api.CoreV1Api, "read_namespaced_pod_log", lambda *args, **kwargs: resp)
+    return resp
+
+
+def test_iter_pod_logs_lines_split_between_chunks(monkeypatch):
+    resp = fake_pod_logs(monkeypatch, [b"fir", b"st\nsec", b"ond\n", b"\nthi", b"rd"])
+
+    assert list(iter_pod_logs("pod")) == ["first\n", "second\n", "\n", "third"]
+    assert resp.released
+
+
+def test_iter_pod_logs_multi_byte_characters_split_between_chunks(monkeypatch):
+    logs = "héllo wörld\n日本語\n".encode("utf-8")
+    # split inside the multi-byte characters
+    fake_pod_logs(monkeypatch, [logs[:2], logs[2:12], logs[12:16], logs[16:]])
+
+    assert list(iter_pod_logs("pod")) == ["héllo wörld\n", "日本語\n"]
+
+
+def test_iter_pod_logs_long_line(monkeypatch):
+    fake_pod_logs(monkeypatch, [b"x" * 1000] * 100 + [b"\n"])
+
+    assert list(iter_pod_logs("pod")) == ["x" * 100000 + "\n"]
@@ -0,0 +1,158 @@
+from typing import List, NamedTuple
+
+import pytest
+from hikaru.model import Container, Job, ObjectMeta, Pod, PodList, PodSpec
+
+from robusta.integrations.kubernetes import custom_models
+from robusta.integrations.kubernetes.custom_models import (
+    RobustaJob,
+    RobustaPod,
+    _cast_hikaru,
+    _pod_from_cache,
+    _use_pod_cache,
+)
+from robusta.integrations.kubernetes.pod_cache import PodCache
+
+
+class Response(NamedTuple):
+    obj: PodList
+
+
+def test_cast_hikaru_pod():
+    pod = Pod(
+        metadata=ObjectMeta(name="test-pod", namespace="default"),
+        spec=PodSpec(containers=[Container(name="runner", image="busybox:1.35")]),
+    )
+    robusta_pod = _cast_hikaru(pod, RobustaPod)
+
+    assert type(robusta_pod) is RobustaPod
+    assert type(pod) is Pod
+    assert robusta_pod.to_dict() == pod.to_dict()
+    assert robusta_pod.spec is pod.spec
+    assert robusta_pod.get_images() == {"busybox": "1.35"}
+
+
+def test_cast_hikaru_job():
+    job = Job(metadata=ObjectMeta(name="test-job", namespace="default"))
+    robusta_job = _cast_hikaru(job, RobustaJob)
+
+    assert type(robusta_job) is RobustaJob
+    assert robusta_job.metadata.name == "test-job"
+
+
+def test_find_pod_returns_a_copy_of_cached_pods(monkeypatch):
+    pods = [
+        Pod(metadata=ObjectMeta(name="test-pod-1", namespace="find-pod-copy", labels={"app": "test"})),
+        Pod(metadata=ObjectMeta(name="other-pod-1", namespace="find-pod-copy", labels={"app": "other"})),
+    ]
+    monkeypatch.setattr(PodList, "listNamespacedPod", lambda *args, **kwargs: Response(PodList(items=pods)))
+
+    pod = RobustaPod.find_pod("test-pod", "find-pod-copy")
+    pod.metadata.labels["app"] = "changed"
+
+    assert RobustaPod.find_pod("test-pod", "find-pod-copy").metadata.labels == {"app": "test"}
+    assert pods[0].metadata.labels == {"app": "test"}
+
+
+def cached_pod(name: str, namespace: str, labels: dict = None) -> dict:
+    # like the pods in a pod list, without apiVersion and kind
+    return {
+        "metadata": {"name": name, "namespace": namespace, "labels": labels},
+        "spec": {"containers": [{"name": "runner", "image": "busybox:1.35"}]},
+    }
+
+
+@pytest.fixture
+def synced_pod_cache(monkeypatch) -> PodCache:
+    cache = PodCache()
+    cache._PodCache__pods = {
+        "pod-cache": {
+            "app-2": cached_pod("app-2", "pod-cache"),
+            "app-1": cached_pod("app-1", "pod-cache"),
+            "job-1-abc": cached_pod("job-1-abc", "pod-cache", labels={"job-name": "job-1"}),
+        }
+    }
+    cache._PodCache__synced = True
+    monkeypatch.setattr(custom_models, "ENABLE_POD_CACHE", True)
+    monkeypatch.setattr(custom_models, "pod_cache", cache)
+    return cache
+
+
+def fake_pod_list(monkeypatch, pods: List[Pod]) -> List[dict]:
+    """
+    Makes PodList.listNamespacedPod return the given pods, and returns the arguments of every call to it
+    """
+    calls = []
+
+    def list_namespaced_pod(namespace, **kwargs):
+        calls.append({"namespace": namespace, **kwargs})
+        return Response(PodList(items=pods))
+
+    monkeypatch.setattr(PodList, "listNamespacedPod", list_namespaced_pod)
+    return calls
+
+
+def test_use_pod_cache(monkeypatch):
+    cache = PodCache()
+    monkeypatch.setattr(custom_models, "pod_cache", cache)
+
+    monkeypatch.setattr(custom_models, "ENABLE_POD_CACHE", False)
+    cache._PodCache__synced = True
+    assert not _use_pod_cache()
+
+    monkeypatch.setattr(custom_models, "ENABLE_POD_CACHE", True)
+    assert _use_pod_cache()
+    cache._PodCache__synced = False
+    assert not _use_pod_cache()
+
+
+def test_pod_from_cache():
+    pod = _pod_from_cache(cached_pod("app-1", "pod-cache"))
+
+    assert type(pod) is RobustaPod
+    assert pod.apiVersion == "v1"
+    assert pod.kind == "Pod"
+    assert pod.metadata.name == "app-1"
+    assert pod.get_images() == {"busybox": "1.35"}
+
+
+def test_find_pod_from_pod_cache(monkeypatch, synced_pod_cache):
+    calls = fake_pod_list(monkeypatch, [])
+
+    pod = RobustaPod.find_pod("app", "pod-cache")
+
+    assert type(pod) is RobustaPod
+    assert pod.metadata.name == "app-1"
+    assert calls == []
+
+
+def test_find_pod_falls_back_to_list_on_pod_cache_miss(monkeypatch, synced_pod_cache):
+    calls = fake_pod_list(monkeypatch, [Pod(metadata=ObjectMeta(name="new-pod-1", namespace="pod-cache"))])
+
+    pod = RobustaPod.find_pod("new-pod", "pod-cache")
+
+    assert type(pod) is RobustaPod
+    assert pod.metadata.name == "new-pod-1"
+    assert len(calls) == 1
+
+
+def test_job_get_pods_from_pod_cache(monkeypatch, synced_pod_cache):
+    calls = fake_pod_list(monkeypatch, [])
+    job = RobustaJob(metadata=ObjectMeta(name="job-1", namespace="pod-cache"))
+
+    pods = job.get_pods()
+
+    assert [type(pod) for pod in pods] == [RobustaPod]
+    assert pods[0].metadata.name == "job-1-abc"
+    assert calls == []
+
+
+def test_job_get_pods_falls_back_to_list_without_label_match(monkeypatch, synced_pod_cache):
+    calls = fake_pod_list(monkeypatch, [Pod(metadata=ObjectMeta(name="job-2-abc", namespace="pod-cache"))])
+    job = RobustaJob(metadata=ObjectMeta(name="job-2", namespace="pod-cache"))
+
+    pods = job.get_pods()
+
+    assert [type(pod) for pod in pods] == [RobustaPod]
+    assert pods[0].metadata.name == "job-2-abc"
+    assert [call["label_selector"] for call in calls] == ["job-name = job-2"]
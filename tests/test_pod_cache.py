@@ -0,0 +1,158 @@
+import json
+from typing import List, Tuple
+
+import pytest
+
+from robusta.integrations.kubernetes import pod_cache as pod_cache_module
+from robusta.integrations.kubernetes.pod_cache import PodCache
+
+
+class StopRunning(BaseException):
+    """
+    Stops PodCache.__run, which catches and retries on any Exception
+    """
+
+
+def make_pod(name: str, namespace: str = "default", resource_version: str = "1", labels: dict = None) -> dict:
+    return {"metadata": {"name": name, "namespace": namespace, "resourceVersion": resource_version, "labels": labels}}
+
+
+def make_event(event_type: str, obj: dict) -> str:
+    return json.dumps({"type": event_type, "object": obj}, ensure_ascii=False)
+
+
+class FakeResponse:
+    def __init__(self, data: bytes = b"", lines: List[str] = (), chunks: List[bytes] = None):
+        self.data = data
+        self.chunks = chunks if chunks is not None else [(line + "\n").encode() for line in lines]
+
+    def read_chunked(self, decode_content=False):
+        yield from self.chunks
+
+    def release_conn(self):
+        pass
+
+
+class FakeCoreV1Api:
+    """
+    Returns the given responses, in order, from list_pod_for_all_namespaces.
+    An exception in the responses is raised instead of returned, and StopRunning is raised once there are none left
+    """
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+        self.timeouts = []
+
+    def list_pod_for_all_namespaces(self, watch=False, **kwargs):
+        self.calls.append("watch" if watch else "list")
+        self.timeouts.append(kwargs.get("_request_timeout"))
+        if not self.responses:
+            raise StopRunning()
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def list_response(pods: List[dict], resource_version: str = "1") -> FakeResponse:
+    return FakeResponse(data=json.dumps({"metadata": {"resourceVersion": resource_version}, "items": pods}).encode())
+
+
+def run_pod_cache(monkeypatch, responses) -> Tuple[PodCache, FakeCoreV1Api]:
+    """
+    Runs the pod cache thread function until the fake API runs out of responses
+    """
+    api = FakeCoreV1Api(responses)
+    monkeypatch.setattr(pod_cache_module.core_v1_api, "CoreV1Api", lambda: api)
+    monkeypatch.setattr(pod_cache_module.time, "sleep", lambda seconds: None)
+    cache = PodCache()
+    with pytest.raises(StopRunning):
+        cache._PodCache__run()
+    return cache, api
+
+
+def test_initial_list():
+    cache = PodCache()
+    api = FakeCoreV1Api([list_response([make_pod("app-1"), make_pod("job-1", labels={"job-name": "job"})])])
+
+    assert not cache.is_synced()
+    assert cache._PodCache__list(api) == "1"
+    assert cache.is_synced()
+    assert cache.find_pod("default", "app")["metadata"]["name"] == "app-1"
+    assert cache.find_pod("other", "app") is None
+    assert [pod["metadata"]["name"] for pod in cache.find_pods_by_label("default", "job-name", "job")] == ["job-1"]
+
+
+def test_watch_events():
+    cache = PodCache()
+    cache._PodCache__list(FakeCoreV1Api([list_response([make_pod("app-1"), make_pod("app-2")])]))
+    events = [
+        make_event("ADDED", make_pod("new-1", resource_version="2")),
+        make_event("MODIFIED", make_pod("app-1", resource_version="3", labels={"version": "2"})),
+        make_event("DELETED", make_pod("app-2", resource_version="4")),
+    ]
+
+    assert cache._PodCache__watch(FakeCoreV1Api([FakeResponse(lines=events)]), "1") == "4"
+    assert cache.find_pod("default", "new")["metadata"]["name"] == "new-1"
+    assert cache.find_pod("default", "app-1")["metadata"]["labels"] == {"version": "2"}
+    assert cache.find_pod("default", "app-2") is None
+
+
+def test_watch_multi_byte_characters_split_between_chunks():
+    cache = PodCache()
+    cache._PodCache__list(FakeCoreV1Api([list_response([])]))
+    events = [make_event("ADDED", make_pod("app-1", labels={"owner": "jürgen"})), "", make_event("ADDED", make_pod("日本"))]
+    events = "\n".join(events).encode("utf-8")
+    # small chunks, so some of them end inside a multi-byte character
+    chunks = [events[i : i + 7] for i in range(0, len(events), 7)]
+
+    cache._PodCache__watch(FakeCoreV1Api([FakeResponse(chunks=chunks)]), "1")
+
+    assert cache.find_pod("default", "app-1")["metadata"]["labels"] == {"owner": "jürgen"}
+    assert cache.find_pod("default", "日") is not None
+
+
+def test_requests_have_client_side_timeouts(monkeypatch):
+    _, api = run_pod_cache(monkeypatch, [list_response([make_pod("app-1")]), FakeResponse()])
+
+    assert api.calls == ["list", "watch", "watch"]
+    list_timeout, watch_timeout = api.timeouts[:2]
+    assert list_timeout is not None
+    # the read timeout must outlast the server side watch timeout, or quiet watches would fail
+    assert watch_timeout[1] > pod_cache_module.POD_CACHE_WATCH_TIMEOUT_SEC
+
+
+def test_find_pod_returns_lowest_matching_name():
+    cache = PodCache()
+    cache._PodCache__list(FakeCoreV1Api([list_response([make_pod("app-2")])]))
+    cache._PodCache__watch(FakeCoreV1Api([FakeResponse(lines=[make_event("ADDED", make_pod("app-1"))])]), "1")
+
+    assert cache.find_pod("default", "app")["metadata"]["name"] == "app-1"
+    assert cache.find_pod("default", "app-2")["metadata"]["name"] == "app-2"
+
+
+def test_error_event_relists(monkeypatch):
+    gone = make_event("ERROR", {"kind": "Status", "code": 410})
+    cache, api = run_pod_cache(
+        monkeypatch,
+        [
+            list_response([make_pod("app-1")]),
+            FakeResponse(lines=[gone]),
+            list_response([make_pod("app-2")], resource_version="5"),
+        ],
+    )
+
+    assert api.calls == ["list", "watch", "list", "watch"]
+    assert cache.find_pod("default", "app-1") is None
+    assert cache.find_pod("default", "app-2") is not None
+
+
+def test_not_synced_after_exception(monkeypatch):
+    cache, api = run_pod_cache(
+        monkeypatch,
+        [list_response([make_pod("app-1")]), Exception("connection reset")],
+    )
+
+    assert api.calls == ["list", "watch", "list"]
+    assert not cache.is_synced()
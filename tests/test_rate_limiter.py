@@ -0,0 +1,48 @@
+from collections import OrderedDict
+
+import pytest
+
+from robusta.utils import rate_limiter
+from robusta.utils.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake_clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake_clock.monotonic)
+    monkeypatch.setattr(RateLimiter, "limiter_map", OrderedDict())
+    return fake_clock
+
+
+def test_allowed_again_after_period(clock):
+    assert RateLimiter.mark_and_test("operation", "id", 60)
+    clock.now += 30
+    assert not RateLimiter.mark_and_test("operation", "id", 60)
+    clock.now += 31
+    assert RateLimiter.mark_and_test("operation", "id", 60)
+    assert not RateLimiter.mark_and_test("operation", "id", 60)
+
+
+def test_oldest_key_evicted_at_max_entries(clock, monkeypatch):
+    monkeypatch.setattr(RateLimiter, "MAX_ENTRIES", 2)
+    assert RateLimiter.mark_and_test("operation", "1", 60)
+    assert RateLimiter.mark_and_test("operation", "2", 60)
+    assert RateLimiter.mark_and_test("operation", "3", 60)
+
+    assert list(RateLimiter.limiter_map) == [("operation", "2"), ("operation", "3")]
+    # the evicted key is forgotten, so it is allowed again within the period
+    assert RateLimiter.mark_and_test("operation", "1", 60)
+    assert not RateLimiter.mark_and_test("operation", "3", 60)
+
+
+def test_keys_do_not_collide(clock):
+    assert RateLimiter.mark_and_test("ab", "c", 60)
+    assert RateLimiter.mark_and_test("a", "bc", 60)